@@ -1,21 +1,22 @@
+import time
+
+_SCRIPT_START = time.perf_counter()
+
 import streamlit as st
-import matplotlib
-import pandas as pd
 import os
 
-# Set the backend to a non-interactive one BEFORE importing pyplot
-matplotlib.use("Agg")
-
-from pandasai import SmartDataframe
-from pandasai.core.response.chart import ChartResponse
-from pandasai.core.response.dataframe import DataFrameResponse
-from pandasai.core.prompts.base import BasePrompt
+# Select the non-interactive backend before anything imports matplotlib. The
+# environment variable is honoured whenever matplotlib is first imported, so
+# matplotlib itself no longer has to be loaded at script start.
+os.environ["MPLBACKEND"] = "Agg"
 
-from src.ui import setup_page, setup_sidebar, display_chat_history, get_response_message, render_message
+from src.ui import setup_page, setup_sidebar, display_chat_history, display_startup_report, display_usage_report, get_response_message, render_message
 from src.data_processing import load_and_process_data
-from src.llm_config import configure_llm
+from src.llm_config import configure_llm, model_for, route_stage
 from src.agent_handler import create_extraction_agent, create_processing_agent, chat_with_agent
 from src.intent_detector import get_intents, get_analysis_type
+from src.warmup import start_warmup, wait_for_warmup, get_prewarmed_llm, record_timing, record_run_timing, timed_import, startup_report, run_report, startup_report_enabled
+from src.usage_tracker import start_request, call_llm, track_llm, track_stage, current_records, session_totals
 from src.prompts import (
     ANALYSIS_PROMPT_TEMPLATE, 
     GUIDANCE_PROMPT_TEMPLATE, 
@@ -25,11 +26,28 @@ from src.prompts import (
     DATAFRAME_REQUEST_EXTRACTION_PROMPT_TEMPLATE
 )
 
+record_timing("app imports", time.perf_counter() - _SCRIPT_START)
+
 @st.cache_resource
-def get_llm(llm_option):
+def get_llm(llm_option, tier="main"):
     """Cached function to configure and return an LLM."""
-    print(f"--- [CACHE MISS] Configuring LLM: {llm_option} ---")
-    return configure_llm(llm_option)
+    llm = get_prewarmed_llm(llm_option, tier)
+    if llm is not None:
+        print(f"--- [CACHE MISS] Using pre-warmed LLM: {llm_option} ({tier}) ---")
+        return llm
+    print(f"--- [CACHE MISS] Configuring LLM: {llm_option} ({tier}) ---")
+    return configure_llm(llm_option, tier)
+
+def call_stage(llm_option, stage, prompt_text):
+    """Runs a single-prompt stage on the model chosen by the routing policy."""
+    tier = route_stage(llm_option, stage)
+    return call_llm(
+        get_llm(llm_option, tier),
+        prompt_text,
+        stage,
+        model=model_for(llm_option, tier),
+        baseline_model=model_for(llm_option, "main"),
+    )
 
 def main():
     """Main function to run the Streamlit application."""
@@ -62,21 +80,33 @@ def main():
         with st.chat_message("user"):
             render_message(user_message)
 
+        start_request()
+        debug_container = st.expander("🐛 操作日志")
+        main_model = model_for(llm_option, "main")
         try:
-            llm = get_llm(llm_option)
-            debug_container = st.expander("🐛 操作日志")
+            # Heavy pandasai modules are imported on first use (or already
+            # loaded by the warm-up thread) instead of at script start. Wait
+            # for a running warm-up first so both threads never import
+            # pandasai at the same time.
+            wait_for_warmup(llm_option)
+            ChartResponse = timed_import("pandasai.core.response.chart").ChartResponse
+            DataFrameResponse = timed_import("pandasai.core.response.dataframe").DataFrameResponse
+
+            # Agents get a tracking copy so their code-generation calls are
+            # counted in the usage report.
+            llm = track_llm(get_llm(llm_option), main_model)
 
             # --- Step 1: Intent & Analysis Type Detection ---
             with debug_container:
                 st.write("Step 1: 识别用户意图和问题类型...")
             with st.spinner("正在识别您的意图..."):
-                intents = get_intents(question)
+                intents = get_intents(question, llm_call=lambda text: call_stage(llm_option, "intent", text))
             st.info(f"🤖 已识别意图: {', '.join(intents)}")
             
             analysis_type = None
             if "string" in intents:
                 with st.spinner("正在判断问题类型..."):
-                    analysis_type = get_analysis_type(question)
+                    analysis_type = get_analysis_type(question, llm_call=lambda text: call_stage(llm_option, "analysis_type", text))
                 st.info(f"🧐 问题类型: {analysis_type}")
 
             # --- ROUTING ---
@@ -89,19 +119,22 @@ def main():
                 # --- 2a. Data Extraction ---
                 with st.spinner("正在生成数据提取指令..."):
                     simplification_prompt_str = SIMPLIFICATION_PROMPT_TEMPLATE.format(question=question)
-                    prompt_obj = BasePrompt()
-                    prompt_obj._resolved_prompt = simplification_prompt_str
-                    simplified_question = llm.call(prompt_obj)
+                    simplified_question = call_stage(llm_option, "simplification", simplification_prompt_str)
                 with debug_container:
                     st.subheader("Step 2a: 简化后的提取问题")
                     st.write(simplified_question)
 
                 with st.spinner("正在提取相关数据..."):
                     extraction_agent = create_extraction_agent(df, llm)
-                    extracted_data_response = chat_with_agent(extraction_agent, simplified_question)
+                    with track_stage("extraction_agent", main_model):
+                        extracted_data_response = chat_with_agent(extraction_agent, simplified_question)
                 
                 if not isinstance(extracted_data_response, DataFrameResponse) or extracted_data_response.value.empty:
                     st.error("深度分析的数据提取步骤未能返回有效的表格数据。")
+                    # st.stop() blocks any further rendering, so the usage
+                    # report for this failed run has to be drawn first.
+                    with debug_container:
+                        display_usage_report(current_records(), session_totals())
                     st.stop()
                 
                 extracted_df = extracted_data_response.value
@@ -116,9 +149,7 @@ def main():
                 with st.spinner("生成专属分析指令..."):
                     data_sample_csv = extracted_df.head().to_csv(index=False)
                     prompt_for_guidance = GUIDANCE_PROMPT_TEMPLATE.format(question=question, data_sample=data_sample_csv)
-                    guidance_prompt_obj = BasePrompt()
-                    guidance_prompt_obj._resolved_prompt = prompt_for_guidance
-                    analysis_guidance = llm.call(guidance_prompt_obj)
+                    analysis_guidance = call_stage(llm_option, "guidance", prompt_for_guidance)
                 
                 with debug_container:
                     st.subheader("Step 3a: 生成的分析指导")
@@ -127,9 +158,7 @@ def main():
                 with st.spinner("正在生成最终分析报告..."):
                     data_csv = extracted_df.to_csv(index=False)
                     final_prompt_str = ANALYSIS_PROMPT_TEMPLATE.format(query=question, guidance=analysis_guidance, data=data_csv)
-                    prompt_obj = BasePrompt()
-                    prompt_obj._resolved_prompt = final_prompt_str
-                    analysis_report = llm.call(prompt_obj)
+                    analysis_report = call_stage(llm_option, "analysis_report", final_prompt_str)
                 text_message = get_response_message(analysis_report, "string")
                 st.session_state.messages.append(text_message)
                 with st.chat_message("assistant"):
@@ -141,14 +170,13 @@ def main():
                         st.write("Step 4: 检测到绘图意图，在分析基础上生成图表...")
                     with st.spinner("正在提取绘图指令..."):
                         plot_request_prompt_str = PLOT_REQUEST_EXTRACTION_PROMPT_TEMPLATE.format(question=question)
-                        prompt_obj = BasePrompt()
-                        prompt_obj._resolved_prompt = plot_request_prompt_str
-                        plot_question = llm.call(prompt_obj)
+                        plot_question = call_stage(llm_option, "plot_extraction", plot_request_prompt_str)
                     
                     with st.spinner("正在生成图表..."):
                         # Use the already extracted dataframe
                         chart_agent = create_processing_agent(extracted_df, llm)
-                        response = chat_with_agent(chart_agent, plot_question)
+                        with track_stage("chart_agent", main_model):
+                            response = chat_with_agent(chart_agent, plot_question)
                     
                     if isinstance(response, ChartResponse):
                         plot_message = get_response_message(response.value, "plot")
@@ -171,12 +199,10 @@ def main():
                         st.write("  - 处理绘图请求...")
                     with st.spinner("正在提取绘图指令..."):
                         plot_request_prompt_str = PLOT_REQUEST_EXTRACTION_PROMPT_TEMPLATE.format(question=question)
-                        prompt_obj = BasePrompt()
-                        prompt_obj._resolved_prompt = plot_request_prompt_str
-                        plot_question = llm.call(prompt_obj)
+                        plot_question = call_stage(llm_option, "plot_extraction", plot_request_prompt_str)
                     
                     if plot_question:
-                        with st.spinner("正在生成图表..."):
+                        with st.spinner("正在生成图表..."), track_stage("chart_agent", main_model):
                             response = chat_with_agent(processing_agent, plot_question)
                         if isinstance(response, ChartResponse):
                             plot_message = get_response_message(response.value, "plot")
@@ -194,12 +220,10 @@ def main():
                     # Use the prompt from the central file
                     with st.spinner("正在提取表格计算指令..."):
                         dataframe_request_prompt_str = DATAFRAME_REQUEST_EXTRACTION_PROMPT_TEMPLATE.format(question=question)
-                        prompt_obj = BasePrompt()
-                        prompt_obj._resolved_prompt = dataframe_request_prompt_str
-                        dataframe_question = llm.call(prompt_obj)
+                        dataframe_question = call_stage(llm_option, "dataframe_extraction", dataframe_request_prompt_str)
 
                     if dataframe_question:
-                        with st.spinner("正在计算并生成表格..."):
+                        with st.spinner("正在计算并生成表格..."), track_stage("dataframe_agent", main_model):
                             response = chat_with_agent(processing_agent, dataframe_question)
                         if isinstance(response, DataFrameResponse):
                             df_message = get_response_message(response, "dataframe")
@@ -218,7 +242,8 @@ def main():
                     with debug_container:
                         st.write("  - 处理简单问答请求...")
                     with st.spinner("正在生成答案..."):
-                        response = chat_with_agent(processing_agent, question)
+                        with track_stage("lookup_agent", main_model):
+                            response = chat_with_agent(processing_agent, question)
                         text_message = get_response_message(str(response), "string")
                         st.session_state.messages.append(text_message)
                         with st.chat_message("assistant"):
@@ -228,5 +253,16 @@ def main():
             st.error("AI 分析失败，请检查数据格式或问题内容。")
             st.exception(e)
 
+        with debug_container:
+            display_usage_report(current_records(), session_totals())
+
+    if startup_report_enabled():
+        record_run_timing("first script run", time.perf_counter() - _SCRIPT_START)
+        display_startup_report(startup_report(), run_report())
+
+    # Started last so the background imports do not compete with rendering
+    # the page body. Only the first call per option starts a thread.
+    start_warmup(llm_option)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
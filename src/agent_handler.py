@@ -1,11 +1,16 @@
-import pandasai as pai
 import os
+from src.warmup import timed_import
+
+# pandasai pulls in matplotlib, duckdb and friends on import, so it is loaded
+# on first use rather than when the Streamlit script starts.
 
 def create_extraction_agent(df, llm):
     """
     Creates a specialized agent for broad data extraction, intended for deep analysis.
     Uses SQL for querying.
     """
+    pai = timed_import("pandasai")
+
     pai_df = pai.DataFrame(df)
     
     save_path = os.path.join(os.getcwd(), "exports/charts")
@@ -44,6 +49,8 @@ def create_processing_agent(df, llm):
     performing calculations, and returning dataframes or strings.
     Uses Python execution.
     """
+    pai = timed_import("pandasai")
+
     pai_df = pai.DataFrame(df)
     
     save_path = os.path.join(os.getcwd(), "exports/charts")
@@ -1,38 +1,20 @@
-import os
 from typing import List
 import streamlit as st
-from pandasai_litellm import LiteLLM
-from pandasai.core.prompts.base import BasePrompt
 from src.prompts import ANALYSIS_TYPE_PROMPT_TEMPLATE, INTENT_DETECTION_PROMPT_TEMPLATE
 
-# BasePrompt is designed to be subclassed, not instantiated directly for our use case.
-# We create a simple subclass that takes a raw text string as its template.
-class TextPrompt(BasePrompt):
-    def __init__(self, text: str):
-        self.template = text
-        super().__init__()
-
-def get_intents(query: str) -> list:
+def get_intents(query: str, llm_call) -> list:
+    """
+    Detects the user's intents ('plot', 'dataframe', 'string').
+    `llm_call` takes the prompt text and returns the raw reply, so the call
+    goes through the app's model routing and usage tracking.
+    """
     try:
-        # Instantiate Gemini LLM via LiteLLM for intent detection
-        api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            error_message = "GEMINI_API_KEY or GOOGLE_API_KEY environment variable not set."
-            # if debug_container:
-            #     with debug_container:
-            #         st.error(error_message)
-            raise ValueError(error_message)
-
-        llm = LiteLLM(model="gemini/gemini-1.5-pro-latest", api_key=api_key)
-        
         # We should not use an Agent for a simple intent detection task.
         # The Agent's purpose is to generate and execute code, which is not what we need here.
         # Instead, we can call the LLM directly.
         
         prompt_text = INTENT_DETECTION_PROMPT_TEMPLATE.format(query=query)
-        # The llm.call() method requires a Prompt object. We use our custom TextPrompt class.
-        prompt = TextPrompt(prompt_text)
-        raw_content = llm.call(prompt)
+        raw_content = llm_call(prompt_text)
         
         # Always print to console for debugging
         print(f"[INTENT DEBUG] LLM原始返回: {raw_content}")
@@ -60,22 +42,16 @@ def get_intents(query: str) -> list:
         print(f"Error during intent detection: {e}")
         return ["string"]
 
-def get_analysis_type(query: str) -> str:
+def get_analysis_type(query: str, llm_call) -> str:
     """
     Classifies a 'string' type query as either 'simple_lookup' or 'deep_analysis'.
+    `llm_call` works as in get_intents.
     """
     try:
-        # Re-use the same LLM setup as get_intents
-        api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY or GOOGLE_API_KEY environment variable not set.")
-
-        llm = LiteLLM(model="gemini/gemini-1.5-pro-latest", api_key=api_key)
-        
         prompt_text = ANALYSIS_TYPE_PROMPT_TEMPLATE.format(question=query)
         
-        prompt = TextPrompt(prompt_text) # Reusing TextPrompt class from this file
-        raw_content = llm.call(prompt)
+        # Re-use the same LLM setup as get_intents
+        raw_content = llm_call(prompt_text)
         
         print(f"[ANALYSIS_TYPE DEBUG] LLM原始返回: {raw_content}")
         
@@ -1,20 +1,104 @@
 import os
 import streamlit as st
-from pandasai_openai import OpenAI, AzureOpenAI
-from pandasai_litellm import LiteLLM
 
-def configure_llm(llm_option):
+# The provider SDKs (pandasai_openai / pandasai_litellm) are heavy to import, so
+# they are only loaded inside the branch that actually needs them.
+
+# Approximate list prices in USD per 1M tokens (input, output), used for the
+# per-stage cost estimates in the debug panel. Fast models named by the user
+# (e.g. an Azure deployment) are priced through FAST_PRICE_ENV instead. Models
+# without a price are flagged as unpriced in the panel.
+MODEL_PRICING = {
+    "deploy_gpt4o": (2.50, 10.00),
+    "gemini/gemini-1.5-pro-latest": (1.25, 5.00),
+    "gemini/gemini-1.5-flash-latest": (0.075, 0.30),
+    "deepseek-chat": (0.27, 1.10),
+}
+
+# Environment variables holding the fast model's price as "input,output" USD
+# per 1M tokens, e.g. AZURE_OPENAI_FAST_PRICE="0.15,0.60".
+FAST_PRICE_ENV = {
+    "GPT-4o": "AZURE_OPENAI_FAST_PRICE",
+    "Gemini": "GEMINI_FAST_PRICE",
+    "Deepseek": "DEEPSEEK_FAST_PRICE",
+}
+
+# Cheap, low-stakes stages (classification, instruction extraction and
+# question simplification) go to the "fast" model. Everything else, in
+# particular the analysis report and the code-generating agents, stays on the
+# model the user picked.
+FAST_STAGES = {
+    "intent",
+    "analysis_type",
+    "simplification",
+    "plot_extraction",
+    "dataframe_extraction",
+}
+
+def routing_enabled():
+    """Routing runs unless DATAANALYZER_ROUTING is set to a false-ish value."""
+    return os.getenv("DATAANALYZER_ROUTING", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+def model_for(llm_option, tier="main"):
     """
-    Configures and returns an LLM instance based on the user's selection.
-    Handles API key loading from environment variables.
+    Returns the model (or Azure deployment) name used for `llm_option` at the
+    given tier ("main" or "fast"). Returns None if no fast model is configured.
     """
+    if llm_option == "GPT-4o":
+        if tier == "fast":
+            return os.getenv("AZURE_OPENAI_FAST_DEPLOYMENT")
+        return "deploy_gpt4o"
+    elif llm_option == "Gemini":
+        if tier == "fast":
+            return os.getenv("GEMINI_FAST_MODEL", "gemini/gemini-1.5-flash-latest")
+        return "gemini/gemini-1.5-pro-latest"
+    elif llm_option == "Deepseek":
+        if tier == "fast":
+            return os.getenv("DEEPSEEK_FAST_MODEL")
+        return "deepseek-chat"
+    return None
+
+def model_price(model):
+    """
+    Returns the (input, output) USD price per 1M tokens for `model`, or None
+    if it is unknown. A price set in FAST_PRICE_ENV for a configured fast
+    model takes precedence over MODEL_PRICING.
+    """
+    if not model:
+        return None
+    for llm_option, env_name in FAST_PRICE_ENV.items():
+        value = os.getenv(env_name)
+        if value and model == model_for(llm_option, "fast"):
+            try:
+                input_price, output_price = (float(part) for part in value.split(","))
+                return input_price, output_price
+            except ValueError:
+                print(f"Ignoring invalid {env_name}={value!r}, expected 'input,output'")
+    return MODEL_PRICING.get(model)
+
+def route_stage(llm_option, stage):
+    """
+    Returns the tier ("main" or "fast") a pipeline stage should run on.
+    Falls back to "main" when routing is disabled or no fast model is set.
+    """
+    if stage in FAST_STAGES and routing_enabled() and model_for(llm_option, "fast"):
+        return "fast"
+    return "main"
+
+def build_llm(llm_option, tier="main"):
+    """
+    Builds and returns an LLM instance based on the user's selection.
+    Raises ValueError if the required environment variables are missing,
+    so it can also be used outside a Streamlit script run (e.g. warm-up).
+    """
+    model_name = model_for(llm_option, tier) or model_for(llm_option, "main")
     if llm_option == "GPT-4o":
         api_key = os.getenv("AZURE_OPENAI_KEY")
         azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        deployment_name = "deploy_gpt4o"
+        deployment_name = model_name
         if not api_key or not azure_endpoint:
-            st.error("请在环境变量中设置 AZURE_OPENAI_KEY 和 AZURE_OPENAI_ENDPOINT")
-            st.stop()
+            raise ValueError("请在环境变量中设置 AZURE_OPENAI_KEY 和 AZURE_OPENAI_ENDPOINT")
+        from pandasai_openai import AzureOpenAI
         return AzureOpenAI(
             model=f"azure/{deployment_name}", 
             deployment_name=deployment_name, 
@@ -24,20 +108,18 @@ def configure_llm(llm_option):
         )
     elif llm_option == "Gemini":
         api_key = os.getenv("GOOGLE_API_KEY")
-        model_name = "gemini/gemini-1.5-pro-latest"
         if not api_key:
-            st.error("请在环境变量中设置 GOOGLE_API_KEY")
-            st.stop()
+            raise ValueError("请在环境变量中设置 GOOGLE_API_KEY")
         os.environ["GEMINI_API_KEY"] = api_key
+        from pandasai_litellm import LiteLLM
         return LiteLLM(model=model_name)
         
     elif llm_option == "Deepseek":
         api_key = os.getenv("DEEPSEEK_API_KEY")
         api_base = os.getenv("DEEPSEEK_API_URL")
-        model_name = "deepseek-chat"
         if not api_key or not api_base:
-            st.error("请在环境变量中设置 DEEPSEEK_API_KEY 和 DEEPSEEK_API_URL")
-            st.stop()
+            raise ValueError("请在环境变量中设置 DEEPSEEK_API_KEY 和 DEEPSEEK_API_URL")
+        from pandasai_openai import OpenAI
         return OpenAI(
             api_token=api_key, 
             api_base=api_base, 
@@ -45,5 +127,21 @@ def configure_llm(llm_option):
             is_chat_model=True
         )
     else:
-        st.error("未知的模型选项！")
-        st.stop() 
\ No newline at end of file
+        raise ValueError("未知的模型选项！")
+
+def provider_modules(llm_option):
+    """Returns the provider modules that `build_llm` imports for an option."""
+    if llm_option == "Gemini":
+        return ["pandasai_litellm"]
+    return ["pandasai_openai"]
+
+def configure_llm(llm_option, tier="main"):
+    """
+    Configures and returns an LLM instance based on the user's selection.
+    Handles API key loading from environment variables.
+    """
+    try:
+        return build_llm(llm_option, tier)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
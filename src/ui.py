@@ -29,6 +29,55 @@ def setup_sidebar():
         uploaded_file = st.file_uploader("选择 CSV 数据文件", type="csv")
     return llm_option, uploaded_file
 
+def display_startup_report(report, run_report):
+    """Shows script-run and import timings in a collapsed sidebar expander."""
+    with st.sidebar:
+        with st.expander("⏱️ 启动耗时"):
+            st.write("脚本运行:")
+            st.table(pd.DataFrame(
+                [{"阶段": stage, "耗时 (ms)": round(seconds * 1000, 1)} for stage, seconds in run_report]
+            ))
+            st.write("导入与客户端构建:")
+            if not report:
+                st.write("暂无记录（尚未导入重量级模块）。")
+                return
+            st.table(pd.DataFrame(
+                [{"阶段": stage, "耗时 (ms)": round(seconds * 1000, 1)} for stage, seconds in report]
+            ))
+
+def display_usage_report(records, totals):
+    """Shows per-stage latency, estimated tokens and cost, plus session totals."""
+    st.subheader("本次请求各阶段耗时与成本（估算）")
+    if records:
+        st.table(pd.DataFrame([
+            {
+                "阶段": r["stage"],
+                "模型": r["model"] or "-",
+                "耗时 (s)": round(r["latency"], 2),
+                "输入 tokens": r["input_tokens"] if r["input_tokens"] is not None else "-",
+                "输出 tokens": r["output_tokens"] if r["output_tokens"] is not None else "-",
+                "成本 ($)": f"{r['cost']:.5f}" if r["cost"] is not None else ("未定价" if r["unpriced"] else "-"),
+                "节省 ($)": "未定价" if r["unpriced"] else (f"{r['baseline_cost'] - r['cost']:.5f}" if r["cost"] is not None else "-"),
+            }
+            for r in records
+        ]))
+    else:
+        st.write("暂无记录。")
+
+    st.subheader("会话累计")
+    saved = totals["baseline_cost"] - totals["cost"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("问题数 / 调用数", f"{totals['questions']} / {totals['calls']}")
+    col2.metric("Tokens (输入/输出)", f"{totals['input_tokens']} / {totals['output_tokens']}")
+    col3.metric("总耗时 (s)", f"{totals['latency']:.1f}")
+    col4.metric("成本 ($)", f"{totals['cost']:.4f}", delta=f"-{saved:.4f} 路由节省", delta_color="off")
+    if totals["unpriced_calls"]:
+        st.warning(
+            f"有 {totals['unpriced_calls']} 个阶段的模型价格未知，未计入成本与节省。"
+            "可通过 AZURE_OPENAI_FAST_PRICE / GEMINI_FAST_PRICE / DEEPSEEK_FAST_PRICE"
+            "（格式：输入,输出 美元/百万 tokens）设置快速模型价格。"
+        )
+
 def display_chat_history():
     """Initializes and displays the chat history from session state."""
     if "messages" not in st.session_state:
@@ -0,0 +1,170 @@
+import copy
+import math
+import time
+from contextlib import contextmanager
+import streamlit as st
+from src.llm_config import model_price
+from src.warmup import timed_import
+
+# Per-stage token, latency and cost accounting. Records for the current
+# question live in st.session_state.usage_records, running totals for the
+# session in st.session_state.usage_totals.
+#
+# pandasai's llm.call() only returns the reply text, so token counts are
+# estimated from the prompt and reply: roughly one token per CJK character
+# and one per four other characters. Agents get an LLM wrapped by track_llm,
+# so the calls they make inside a track_stage block are counted the same way.
+
+def estimate_tokens(text) -> int:
+    """Roughly estimates the number of tokens in a piece of text."""
+    text = str(text or "")
+    cjk = sum(1 for ch in text if "\u4e00" <= ch <= "\u9fff")
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+def estimate_cost(model, input_tokens, output_tokens):
+    """Returns the estimated USD cost of a call, or None if the model has no price."""
+    pricing = model_price(model)
+    if pricing is None or input_tokens is None:
+        return None
+    input_price, output_price = pricing
+    return (input_tokens * input_price + (output_tokens or 0) * output_price) / 1_000_000
+
+def _totals():
+    if "usage_totals" not in st.session_state:
+        st.session_state.usage_totals = {
+            "questions": 0,
+            "calls": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "latency": 0.0,
+            "cost": 0.0,
+            "baseline_cost": 0.0,
+            "unpriced_calls": 0,
+        }
+    return st.session_state.usage_totals
+
+def start_request():
+    """Resets the per-question records. Call once per user question."""
+    st.session_state.usage_records = []
+    _totals()["questions"] += 1
+
+def record_stage(stage, model, latency, input_tokens=None, output_tokens=None, baseline_model=None):
+    """
+    Records one pipeline stage. `baseline_model` is the model the stage would
+    have used without routing; it is used to compute the cost saved. Stages
+    with tokens but no known price are marked unpriced and left out of the
+    cost totals.
+    """
+    cost = estimate_cost(model, input_tokens, output_tokens)
+    baseline_cost = estimate_cost(baseline_model or model, input_tokens, output_tokens)
+    unpriced = input_tokens is not None and (cost is None or baseline_cost is None)
+    record = {
+        "stage": stage,
+        "model": model,
+        "latency": latency,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost": cost,
+        "baseline_cost": baseline_cost,
+        "unpriced": unpriced,
+    }
+    if "usage_records" not in st.session_state:
+        st.session_state.usage_records = []
+    st.session_state.usage_records.append(record)
+
+    totals = _totals()
+    totals["calls"] += 1
+    totals["latency"] += latency
+    totals["input_tokens"] += input_tokens or 0
+    totals["output_tokens"] += output_tokens or 0
+    if unpriced:
+        totals["unpriced_calls"] += 1
+    elif cost is not None and baseline_cost is not None:
+        totals["cost"] += cost
+        totals["baseline_cost"] += baseline_cost
+
+    print(
+        f"[USAGE DEBUG] {stage}: model={model} latency={latency:.2f}s "
+        f"in={input_tokens} out={output_tokens} cost={cost}"
+    )
+    return record
+
+def call_llm(llm, prompt_text: str, stage: str, model=None, baseline_model=None) -> str:
+    """Calls `llm` with a raw prompt string and records the stage's usage."""
+    BasePrompt = timed_import("pandasai.core.prompts.base").BasePrompt
+
+    prompt_obj = BasePrompt()
+    prompt_obj._resolved_prompt = prompt_text
+    start = time.perf_counter()
+    result = llm.call(prompt_obj)
+    record_stage(
+        stage,
+        model,
+        time.perf_counter() - start,
+        input_tokens=estimate_tokens(prompt_text),
+        output_tokens=estimate_tokens(result),
+        baseline_model=baseline_model,
+    )
+    return result
+
+def _prompt_text(instruction) -> str:
+    if hasattr(instruction, "to_string"):
+        return instruction.to_string()
+    return str(instruction)
+
+def track_llm(llm, model=None):
+    """
+    Returns a copy of `llm` whose call() adds estimated tokens to the
+    enclosing track_stage block. A copy keeps the provider class, so pandasai
+    accepts it as an agent's LLM. Calls made outside a block are recorded as
+    an "agent" stage of their own.
+    """
+    tracked = copy.copy(llm)
+    original_call = llm.call
+
+    def call(instruction, *args, **kwargs):
+        start = time.perf_counter()
+        result = original_call(instruction, *args, **kwargs)
+        input_tokens = estimate_tokens(_prompt_text(instruction))
+        output_tokens = estimate_tokens(result)
+        active = st.session_state.get("usage_active_stage")
+        if active is None:
+            record_stage("agent", model, time.perf_counter() - start, input_tokens, output_tokens)
+        else:
+            active["input_tokens"] += input_tokens
+            active["output_tokens"] += output_tokens
+            active["llm_calls"] += 1
+        return result
+
+    tracked.call = call
+    return tracked
+
+@contextmanager
+def track_stage(stage: str, model=None):
+    """
+    Records an agent stage: its total latency plus the tokens of all calls
+    made through a track_llm-wrapped LLM inside the block.
+    """
+    active = {"input_tokens": 0, "output_tokens": 0, "llm_calls": 0}
+    st.session_state.usage_active_stage = active
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        st.session_state.usage_active_stage = None
+        counted = active["llm_calls"] > 0
+        record_stage(
+            stage,
+            model,
+            time.perf_counter() - start,
+            input_tokens=active["input_tokens"] if counted else None,
+            output_tokens=active["output_tokens"] if counted else None,
+        )
+
+def current_records():
+    """Returns the usage records of the current question."""
+    return st.session_state.get("usage_records", [])
+
+def session_totals():
+    """Returns the running usage totals for this session."""
+    return dict(_totals())
@@ -0,0 +1,142 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+from src.llm_config import build_llm, model_for, provider_modules, routing_enabled
+
+# Modules that are only needed once the user asks a question. They are imported
+# lazily by the app; the warm-up thread loads them in the background so the
+# first question does not pay for them either. matplotlib goes first so its
+# cost is reported separately from pandasai, which imports it.
+HEAVY_MODULES = [
+    "matplotlib",
+    "pandasai",
+    "pandasai.core.response.chart",
+    "pandasai.core.response.dataframe",
+    "pandasai.core.prompts.base",
+]
+
+_lock = threading.Lock()
+_threads = {}
+_llms = {}
+_timings = {}
+_run_timings = {}
+
+def warmup_enabled():
+    """Warm-up runs unless DATAANALYZER_WARMUP is set to a false-ish value."""
+    return os.getenv("DATAANALYZER_WARMUP", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+def startup_report_enabled():
+    """The startup-time report is only shown when DATAANALYZER_STARTUP_REPORT is set."""
+    return os.getenv("DATAANALYZER_STARTUP_REPORT", "0").strip().lower() in {"1", "true", "yes", "on"}
+
+def record_timing(stage, seconds):
+    """Records how long an import or client build took. The first measurement wins."""
+    with _lock:
+        _timings.setdefault(stage, seconds)
+
+def record_run_timing(stage, seconds):
+    """Records a whole-script timing (e.g. the first run), kept apart from imports."""
+    with _lock:
+        _run_timings.setdefault(stage, seconds)
+
+def timed_import(module_name):
+    """
+    Imports a module and records the time spent if it was not loaded yet.
+    Lazy imports of heavy modules on the script thread go through this too,
+    so the report covers them whichever thread loads them first.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    record_timing(f"import {module_name}", time.perf_counter() - start)
+    return module
+
+def _warm(llm_option):
+    for module_name in HEAVY_MODULES + provider_modules(llm_option):
+        try:
+            timed_import(module_name)
+        except Exception as e:
+            print(f"[WARMUP] Failed to import {module_name}: {e}")
+
+    tiers = ["main"]
+    if routing_enabled() and model_for(llm_option, "fast"):
+        tiers.append("fast")
+    for tier in tiers:
+        start = time.perf_counter()
+        try:
+            llm = build_llm(llm_option, tier)
+        except Exception as e:
+            # Missing keys etc. are reported to the user by configure_llm later.
+            print(f"[WARMUP] Could not pre-build LLM {llm_option} ({tier}): {e}")
+            return
+        record_timing(f"build_llm {llm_option} ({tier})", time.perf_counter() - start)
+        with _lock:
+            _llms[(llm_option, tier)] = llm
+
+def start_warmup(llm_option):
+    """
+    Starts a background thread that imports the heavy agent/provider modules
+    and pre-builds the LLM clients (main and, if routed, fast) for
+    `llm_option`. The intent detector runs on these clients, so no separate
+    intent client is needed. Safe to call on every script rerun: each option
+    is only warmed once per process.
+    Returns the thread, or None if warm-up is disabled.
+    """
+    if not warmup_enabled():
+        return None
+    with _lock:
+        thread = _threads.get(llm_option)
+        if thread is None:
+            thread = threading.Thread(
+                target=_warm, args=(llm_option,), name=f"warmup-{llm_option}", daemon=True
+            )
+            _threads[llm_option] = thread
+            thread.start()
+    return thread
+
+def wait_for_warmup(llm_option):
+    """
+    Blocks until the warm-up thread for `llm_option` has finished. Call this
+    before importing any of HEAVY_MODULES on the script thread: importing the
+    same package from two threads at once can hand one of them a partially
+    initialised module. Returns False if no warm-up was started.
+    """
+    with _lock:
+        thread = _threads.get(llm_option)
+    if thread is None:
+        return False
+    thread.join()
+    return True
+
+def get_prewarmed_llm(llm_option, tier="main"):
+    """
+    Returns the LLM built by the warm-up thread for `llm_option` and `tier`,
+    waiting for the thread if it is still running. Returns None if no warm-up
+    was started or it could not build the client.
+    """
+    if not wait_for_warmup(llm_option):
+        return None
+    with _lock:
+        return _llms.get((llm_option, tier))
+
+def startup_report():
+    """Returns the recorded import/build timings as (stage, seconds), slowest first."""
+    with _lock:
+        items = list(_timings.items())
+    return sorted(items, key=lambda item: item[1], reverse=True)
+
+def run_report():
+    """Returns the recorded whole-script timings as (stage, seconds)."""
+    with _lock:
+        return list(_run_timings.items())
+
+if __name__ == "__main__":
+    # Usage: python -m src.warmup [GPT-4o|Gemini|Deepseek]
+    option = sys.argv[1] if len(sys.argv) > 1 else "GPT-4o"
+    _warm(option)
+    for stage, seconds in startup_report():
+        print(f"{seconds * 1000:8.1f} ms  {stage}")